@@ -1,32 +1,158 @@
 """Degree Days integration."""
 import datetime
 import logging
+import math
 from datetime import timedelta
+from types import SimpleNamespace
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.core import (HomeAssistant, ServiceCall, ServiceResponse,
+                                SupportsResponse)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import update_coordinator
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 from requests.exceptions import HTTPError, Timeout
 
-from .const import (CONF_CONSUMPTION_SENSOR, CONF_DHW_CONSUMPTION,
-                    CONF_GAS_SENSOR, CONF_GAS_USE_OTHER, CONF_HEATING_LIMIT,
-                    CONF_HEATPUMP, CONF_INDOOR_TEMP, CONF_STARTDAY,
-                    CONF_STARTMONTH, CONF_WEATHER_STATION,
-                    DEFAULT_CONSUMPTION_SENSOR, DEFAULT_DHW_CONSUMPTION,
-                    DEFAULT_HEATING_LIMIT, DEFAULT_HEATPUMP,
-                    DEFAULT_INDOOR_TEMP, DEFAULT_STARTDAY, DEFAULT_STARTMONTH,
-                    DEFAULT_WEATHER_STATION, DOMAIN)
+from .const import (ATTR_CONFIG_ENTRY_ID, ATTR_HEATING_LIMIT_MAX,
+                    ATTR_HEATING_LIMIT_MIN, ATTR_HEATING_LIMIT_STEP,
+                    ATTR_INDOOR_TEMP_MAX, ATTR_INDOOR_TEMP_MIN,
+                    ATTR_INDOOR_TEMP_STEP, CONF_BREAKDOWN,
+                    CONF_CONSUMPTION_SENSOR, CONF_COOLING_BASE_TEMPS,
+                    CONF_DHW_CONSUMPTION, CONF_GAS_SENSOR, CONF_GAS_USE_OTHER,
+                    CONF_HEATING_BASE_TEMPS, CONF_HEATING_LIMIT, CONF_HEATPUMP,
+                    CONF_INDOOR_TEMP, CONF_MAX_CONCURRENT_UPDATES, CONF_SOURCE,
+                    CONF_STARTDAY, CONF_STARTMONTH, CONF_TEMPERATURE_SENSOR,
+                    CONF_WEATHER_STATION, CONF_WEIGHT_FACTORS, DATA_SCHEDULER,
+                    DEFAULT_BREAKDOWN, DEFAULT_CONSUMPTION_SENSOR,
+                    DEFAULT_COOLING_BASE_TEMPS, DEFAULT_DHW_CONSUMPTION,
+                    DEFAULT_HEATING_BASE_TEMPS, DEFAULT_HEATING_LIMIT,
+                    DEFAULT_HEATPUMP, DEFAULT_INDOOR_TEMP,
+                    DEFAULT_MAX_CONCURRENT_UPDATES, DEFAULT_SOURCE,
+                    DEFAULT_STARTDAY, DEFAULT_STARTMONTH, DEFAULT_STEP,
+                    DEFAULT_TEMPERATURE_SENSOR, DEFAULT_WEATHER_STATION,
+                    DEFAULT_WEIGHT_FACTORS, DOMAIN, MAX_GRID_SIZE,
+                    SERVICE_WHAT_IF, SOURCE_LOCAL, STORAGE_SAVE_DELAY,
+                    STORAGE_VERSION)
 from .knmi import KNMI
+from .local import LocalTemperature, LocalTemperatureHistory
+from .regression import ConsumptionRegression
+from .scheduler import ComputeScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = ["sensor"]
 
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Optional(
+                    CONF_MAX_CONCURRENT_UPDATES, default=DEFAULT_MAX_CONCURRENT_UPDATES
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+# Options that change the stored values, other options only add or remove sensors
+RESTORE_OPTIONS = (
+    CONF_SOURCE,
+    CONF_WEATHER_STATION,
+    CONF_TEMPERATURE_SENSOR,
+    CONF_INDOOR_TEMP,
+    CONF_HEATING_LIMIT,
+    CONF_STARTDAY,
+    CONF_STARTMONTH,
+    CONF_CONSUMPTION_SENSOR,
+    CONF_DHW_CONSUMPTION,
+    CONF_HEATPUMP,
+    CONF_WEIGHT_FACTORS,
+)
+
+WHAT_IF_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_INDOOR_TEMP_MIN): vol.Coerce(float),
+        vol.Required(ATTR_INDOOR_TEMP_MAX): vol.Coerce(float),
+        vol.Optional(ATTR_INDOOR_TEMP_STEP, default=DEFAULT_STEP): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1)
+        ),
+        vol.Required(ATTR_HEATING_LIMIT_MIN): vol.Coerce(float),
+        vol.Required(ATTR_HEATING_LIMIT_MAX): vol.Coerce(float),
+        vol.Optional(ATTR_HEATING_LIMIT_STEP, default=DEFAULT_STEP): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1)
+        ),
+    }
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the degree days scheduler and services."""
+    max_concurrent = config.get(DOMAIN, {}).get(CONF_MAX_CONCURRENT_UPDATES, DEFAULT_MAX_CONCURRENT_UPDATES)
+    hass.data[DATA_SCHEDULER] = ComputeScheduler(hass, max_concurrent)
+
+    async def async_what_if(call: ServiceCall) -> ServiceResponse:
+        """Calculate the degree days for a grid of indoor temperatures and heating limits."""
+        coordinator = hass.data.get(DOMAIN, {}).get(call.data[ATTR_CONFIG_ENTRY_ID])
+        if coordinator is None or not isinstance(coordinator.data, KNMI):
+            raise HomeAssistantError(
+                f"No degree days data available for config entry {call.data[ATTR_CONFIG_ENTRY_ID]}"
+            )
+        indoor_temps = get_grid(
+            call.data[ATTR_INDOOR_TEMP_MIN], call.data[ATTR_INDOOR_TEMP_MAX], call.data[ATTR_INDOOR_TEMP_STEP]
+        )
+        heating_limits = get_grid(
+            call.data[ATTR_HEATING_LIMIT_MIN], call.data[ATTR_HEATING_LIMIT_MAX], call.data[ATTR_HEATING_LIMIT_STEP]
+        )
+        return await hass.async_add_executor_job(coordinator.data.what_if, indoor_temps, heating_limits)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_WHAT_IF,
+        async_what_if,
+        schema=WHAT_IF_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    return True
+
+
+def parse_temperatures(value):
+    """Return the list of unique temperatures in a comma separated string."""
+    return list(dict.fromkeys(float(temperature) for temperature in value.split(",") if temperature.strip()))
+
+
+def parse_weight_factors(value):
+    """Return the weight factor per month in a comma separated string with 12 weight factors."""
+    weight_factors = [float(weight_factor) for weight_factor in value.split(",")]
+    if len(weight_factors) != 12 or min(weight_factors) < 0:
+        raise ValueError(f"Expected 12 positive weight factors, got {value}")
+    return dict(enumerate(weight_factors, start=1))
+
+
+def get_grid(minimum, maximum, step):
+    """Return the values from minimum up to and including maximum."""
+    if maximum < minimum:
+        raise HomeAssistantError(f"Maximum {maximum} is lower than minimum {minimum}")
+    size = int(math.floor((maximum - minimum) / step + 1e-9)) + 1
+    if size > MAX_GRID_SIZE:
+        raise HomeAssistantError(f"More than {MAX_GRID_SIZE} values between {minimum} and {maximum}")
+    return [round(minimum + i * step, 2) for i in range(size)]
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up a config entry for graaddagen."""
     coordinator = DegreeDaysData(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+    if await coordinator.async_restore():
+        # Serve the restored data and get new data in the background
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} {entry.entry_id} refresh"
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     entry.async_on_unload(entry.add_update_listener(update_listener))
@@ -40,7 +166,25 @@ async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    scheduler = hass.data[DATA_SCHEDULER]
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        scheduler.async_remove(entry.entry_id)
+        if scheduler.queue_sensor_entry_id == entry.entry_id:
+            # Hand over the queue depth sensor of the integration to another entry
+            scheduler.queue_sensor_entry_id = None
+            for other_entry in hass.config_entries.async_entries(DOMAIN):
+                if other_entry.entry_id != entry.entry_id and other_entry.state is ConfigEntryState.LOADED:
+                    hass.async_create_task(hass.config_entries.async_reload(other_entry.entry_id))
+                    break
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored data of a config entry."""
+    await LocalTemperatureHistory(hass, entry.entry_id, None).async_remove()
+    await ConsumptionRegression(hass, entry.entry_id, None, None).async_remove()
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.state").async_remove()
 
 
 async def async_migrate_entry(hass, config_entry):
@@ -86,6 +230,12 @@ class DegreeDaysData(update_coordinator.DataUpdateCoordinator):
                 CONF_CONSUMPTION_SENSOR: data.pop(CONF_CONSUMPTION_SENSOR, DEFAULT_CONSUMPTION_SENSOR),
                 CONF_DHW_CONSUMPTION: data.pop(CONF_DHW_CONSUMPTION, DEFAULT_DHW_CONSUMPTION),
                 CONF_HEATPUMP: data.pop(CONF_HEATPUMP, DEFAULT_HEATPUMP),
+                CONF_SOURCE: data.pop(CONF_SOURCE, DEFAULT_SOURCE),
+                CONF_TEMPERATURE_SENSOR: data.pop(CONF_TEMPERATURE_SENSOR, DEFAULT_TEMPERATURE_SENSOR),
+                CONF_BREAKDOWN: data.pop(CONF_BREAKDOWN, DEFAULT_BREAKDOWN),
+                CONF_WEIGHT_FACTORS: data.pop(CONF_WEIGHT_FACTORS, DEFAULT_WEIGHT_FACTORS),
+                CONF_HEATING_BASE_TEMPS: data.pop(CONF_HEATING_BASE_TEMPS, DEFAULT_HEATING_BASE_TEMPS),
+                CONF_COOLING_BASE_TEMPS: data.pop(CONF_COOLING_BASE_TEMPS, DEFAULT_COOLING_BASE_TEMPS),
             }
 
             self.hass.config_entries.async_update_entry(
@@ -102,6 +252,17 @@ class DegreeDaysData(update_coordinator.DataUpdateCoordinator):
         self.total_consumption_sensor = entry.options[CONF_CONSUMPTION_SENSOR]
         self.dwh_consumption = entry.options[CONF_DHW_CONSUMPTION]
         self.heatpump = entry.options[CONF_HEATPUMP]
+        self.source = entry.options.get(CONF_SOURCE, DEFAULT_SOURCE)
+        self.temperature_sensor = entry.options.get(CONF_TEMPERATURE_SENSOR, DEFAULT_TEMPERATURE_SENSOR)
+        self.breakdown = entry.options.get(CONF_BREAKDOWN, DEFAULT_BREAKDOWN)
+        self.weight_factors = parse_weight_factors(entry.options.get(CONF_WEIGHT_FACTORS, DEFAULT_WEIGHT_FACTORS))
+        self.heating_base_temps = parse_temperatures(
+            entry.options.get(CONF_HEATING_BASE_TEMPS, DEFAULT_HEATING_BASE_TEMPS)
+        )
+        self.cooling_base_temps = parse_temperatures(
+            entry.options.get(CONF_COOLING_BASE_TEMPS, DEFAULT_COOLING_BASE_TEMPS)
+        )
+        self.scheduler = hass.data[DATA_SCHEDULER]
         self.unique_id = entry.entry_id
         self.name = entry.title
 
@@ -120,15 +281,82 @@ class DegreeDaysData(update_coordinator.DataUpdateCoordinator):
         self.startdate = datetime.datetime.strptime(str(year) + self.start_month + str(self.start_day),
                                                     "%Y%B%d").strftime("%Y%m%d")
 
+        if self.source == SOURCE_LOCAL:
+            self.local_history = LocalTemperatureHistory(hass, self.unique_id, self.temperature_sensor)
+
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{self.unique_id}.state")
+
+        self.regression = None
+        if self.total_consumption_sensor:
+            self.regression = ConsumptionRegression(
+                hass,
+                self.unique_id,
+                self.total_consumption_sensor,
+                [
+                    self.source,
+                    self.weather_station,
+                    self.temperature_sensor,
+                    self.indoor_temp,
+                    self.heating_limit,
+                    list(self.weight_factors.values()),
+                ],
+            )
+
     async def _async_update_data(self):
-        """Update the data from the KNMI device."""
+        """Update the data from the KNMI device or the local temperature sensor."""
         try:
             self.total_consumption_sensor_state = self.hass.states.get(self.total_consumption_sensor)
             self.total_consumption = float(self.total_consumption_sensor_state.state)
         except AttributeError:
             self.total_consumption = 0
+        if self.source == SOURCE_LOCAL:
+            data = await self._async_update_local_data()
+        else:
+            data = await self._async_update_knmi_data()
+        await self._async_update_regression(data)
+        self._store.async_delay_save(lambda: self._data_to_store(data), STORAGE_SAVE_DELAY)
+        return data
+
+    @property
+    def stale(self) -> bool:
+        """Return True if there is no up to date data, such that the update gets priority."""
+        return not isinstance(self.data, KNMI) or not self.last_update_success
+
+    async def async_restore(self) -> bool:
+        """Restore the last stored data, return False if there is no data stored with the current options."""
+        stored = await self._store.async_load()
+        if not stored or self._restore_options(stored["options"]) != self._restore_options(self.config_entry.options):
+            return False
+        self.logger.debug("Restored data of %s", stored["last_updated"])
+        self.async_set_updated_data(SimpleNamespace(**stored["data"]))
+        return True
+
+    @staticmethod
+    def _restore_options(options):
+        """Return the options that change the stored values."""
+        return {key: options.get(key) for key in RESTORE_OPTIONS}
+
+    def _data_to_store(self, data):
+        """Return the sensor values of the data, together with the options they were calculated with."""
+        values = {}
+        for key, value in vars(data).items():
+            if hasattr(value, "item"):
+                # numpy scalar
+                value = value.item()
+            if value is None or isinstance(value, (bool, int, float, str)):
+                values[key] = value
+        return {
+            "options": self._restore_options(self.config_entry.options),
+            "last_updated": datetime.datetime.now().isoformat(),
+            "data": values,
+        }
+
+    async def _async_update_knmi_data(self):
+        """Update the data from the KNMI weather station."""
         try:
-            data = await self.hass.async_add_executor_job(
+            data = await self.scheduler.async_run(
+                self.unique_id,
+                self.stale,
                 KNMI,
                 self.startdate,
                 self.weather_station,
@@ -136,7 +364,11 @@ class DegreeDaysData(update_coordinator.DataUpdateCoordinator):
                 self.heating_limit,
                 self.total_consumption,
                 self.dwh_consumption,
-                self.heatpump
+                self.heatpump,
+                self.breakdown,
+                self.weight_factors,
+                self.heating_base_temps,
+                self.cooling_base_temps
             )
 
         except (OSError, Timeout, HTTPError) as err:
@@ -148,3 +380,62 @@ class DegreeDaysData(update_coordinator.DataUpdateCoordinator):
         )
 
         return data
+
+    async def _async_update_local_data(self):
+        """Update the data from the recorder statistics of the local temperature sensor."""
+        data = await self.scheduler.async_run_job(self.unique_id, self.stale, self._async_calculate_local_data)
+
+        self.logger.debug(
+            "Statistics of %s collected. Total sum degree days this year %s",
+            self.temperature_sensor,
+            data,
+        )
+
+        return data
+
+    async def _async_calculate_local_data(self):
+        """Collect the daily means of the local temperature sensor and calculate the degree days."""
+        # The first collection queries 20 years of statistics, so it is scheduled together with the calculation
+        daily_means = await self.local_history.async_update()
+        if not daily_means:
+            raise update_coordinator.UpdateFailed(
+                f"No daily statistics available for {self.temperature_sensor}"
+            )
+        return await self.hass.async_add_executor_job(
+            LocalTemperature,
+            daily_means,
+            self.startdate,
+            self.indoor_temp,
+            self.heating_limit,
+            self.total_consumption,
+            self.dwh_consumption,
+            self.heatpump,
+            self.breakdown,
+            self.weight_factors,
+            self.heating_base_temps,
+            self.cooling_base_temps
+        )
+
+    async def _async_update_regression(self, data):
+        """Update the fit of the daily consumption versus the weighted degree days."""
+        base_load = slope = None
+        if self.regression is not None:
+            try:
+                await self.regression.async_update(data.df)
+            except Exception as err:  # pylint: disable=broad-except
+                # The degree days are still published without the fit, e.g. when the recorder is not available
+                self.logger.warning(
+                    "Error updating the consumption fit of %s: %s", self.total_consumption_sensor, err
+                )
+            else:
+                base_load = self.regression.base_load
+                slope = self.regression.slope
+                if base_load is not None:
+                    base_load = round(base_load, 3)
+                    slope = round(slope, 3)
+        if self.heatpump:
+            data.energy_consumption_base_load = base_load
+            data.energy_consumption_per_weighted_degree_day_fitted = slope
+        else:
+            data.gas_base_load = base_load
+            data.gas_per_weighted_degree_day_fitted = slope
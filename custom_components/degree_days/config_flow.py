@@ -7,13 +7,21 @@ from homeassistant import config_entries
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import config_validation as cv
 
-from .const import (CONF_CONSUMPTION_SENSOR, CONF_DHW_CONSUMPTION,
-                    CONF_HEATING_LIMIT, CONF_HEATPUMP, CONF_INDOOR_TEMP,
-                    CONF_STARTDAY, CONF_STARTMONTH, CONF_WEATHER_STATION,
-                    DEFAULT_CONSUMPTION_SENSOR, DEFAULT_DHW_CONSUMPTION,
-                    DEFAULT_HEATING_LIMIT, DEFAULT_HEATPUMP,
-                    DEFAULT_INDOOR_TEMP, DEFAULT_STARTDAY, DEFAULT_STARTMONTH,
-                    DEFAULT_WEATHER_STATION, DOMAIN, MONTHS, STATION_MAPPING)
+from . import parse_temperatures, parse_weight_factors
+from .const import (CONF_BREAKDOWN, CONF_CONSUMPTION_SENSOR,
+                    CONF_COOLING_BASE_TEMPS, CONF_DHW_CONSUMPTION,
+                    CONF_HEATING_BASE_TEMPS, CONF_HEATING_LIMIT, CONF_HEATPUMP,
+                    CONF_INDOOR_TEMP, CONF_SOURCE, CONF_STARTDAY,
+                    CONF_STARTMONTH, CONF_TEMPERATURE_SENSOR,
+                    CONF_WEATHER_STATION, CONF_WEIGHT_FACTORS,
+                    DEFAULT_BREAKDOWN, DEFAULT_CONSUMPTION_SENSOR,
+                    DEFAULT_COOLING_BASE_TEMPS, DEFAULT_DHW_CONSUMPTION,
+                    DEFAULT_HEATING_BASE_TEMPS, DEFAULT_HEATING_LIMIT,
+                    DEFAULT_HEATPUMP, DEFAULT_INDOOR_TEMP, DEFAULT_SOURCE,
+                    DEFAULT_STARTDAY, DEFAULT_STARTMONTH,
+                    DEFAULT_TEMPERATURE_SENSOR, DEFAULT_WEATHER_STATION,
+                    DEFAULT_WEIGHT_FACTORS, DOMAIN, MONTHS, SOURCE_KNMI,
+                    SOURCE_LOCAL, SOURCES, STATION_MAPPING)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,9 +29,12 @@ _LOGGER = logging.getLogger(__name__)
 @callback
 def degree_days_entries(hass: HomeAssistant):
     """Return the weather station already configured."""
-    return {
-        entry.data[CONF_WEATHER_STATION] for entry in hass.config_entries.async_entries(DOMAIN)
-    }
+    stations = set()
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        config = entry.options or entry.data
+        if config.get(CONF_SOURCE, DEFAULT_SOURCE) == SOURCE_KNMI:
+            stations.add(config.get(CONF_WEATHER_STATION))
+    return stations
 
 
 class DegreeDaysConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -43,13 +54,24 @@ class DegreeDaysConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             valid_date = await self._date_validation(
                 user_input[CONF_STARTDAY], user_input[CONF_STARTMONTH]
             )
-            invalid_station = await self._weather_station_in_configuration_exists(
-                self.hass, user_input[CONF_WEATHER_STATION]
+            invalid_station = (
+                user_input[CONF_SOURCE] == SOURCE_KNMI
+                and await self._weather_station_in_configuration_exists(
+                    self.hass, user_input[CONF_WEATHER_STATION]
+                )
             )
             if not valid_date:
                 self._errors[CONF_STARTDAY] = "invalid_startday"
             elif invalid_station:
                 self._errors[CONF_WEATHER_STATION] = "already_configured"
+            elif user_input[CONF_SOURCE] == SOURCE_LOCAL and not user_input[CONF_TEMPERATURE_SENSOR]:
+                self._errors[CONF_TEMPERATURE_SENSOR] = "no_temperature_sensor"
+            elif not await self._weight_factors_validation(user_input[CONF_WEIGHT_FACTORS]):
+                self._errors[CONF_WEIGHT_FACTORS] = "invalid_weight_factors"
+            elif not await self._temperatures_validation(user_input[CONF_HEATING_BASE_TEMPS]):
+                self._errors[CONF_HEATING_BASE_TEMPS] = "invalid_temperatures"
+            elif not await self._temperatures_validation(user_input[CONF_COOLING_BASE_TEMPS]):
+                self._errors[CONF_COOLING_BASE_TEMPS] = "invalid_temperatures"
             else:
                 return self.async_create_entry(
                     title="Degree Days", data=user_input
@@ -57,7 +79,9 @@ class DegreeDaysConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         user_input = {}
         # Provide defaults for form
+        user_input[CONF_SOURCE] = DEFAULT_SOURCE
         user_input[CONF_WEATHER_STATION] = DEFAULT_WEATHER_STATION
+        user_input[CONF_TEMPERATURE_SENSOR] = DEFAULT_TEMPERATURE_SENSOR
         user_input[CONF_INDOOR_TEMP] = DEFAULT_INDOOR_TEMP
         user_input[CONF_HEATING_LIMIT] = DEFAULT_HEATING_LIMIT
         user_input[CONF_STARTDAY] = DEFAULT_STARTDAY
@@ -65,6 +89,10 @@ class DegreeDaysConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         user_input[CONF_CONSUMPTION_SENSOR] = DEFAULT_CONSUMPTION_SENSOR
         user_input[CONF_DHW_CONSUMPTION] = DEFAULT_DHW_CONSUMPTION
         user_input[CONF_HEATPUMP] = DEFAULT_HEATPUMP
+        user_input[CONF_BREAKDOWN] = DEFAULT_BREAKDOWN
+        user_input[CONF_WEIGHT_FACTORS] = DEFAULT_WEIGHT_FACTORS
+        user_input[CONF_HEATING_BASE_TEMPS] = DEFAULT_HEATING_BASE_TEMPS
+        user_input[CONF_COOLING_BASE_TEMPS] = DEFAULT_COOLING_BASE_TEMPS
 
         return await self._show_config_form(user_input)
 
@@ -79,9 +107,15 @@ class DegreeDaysConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             step_id="user",
             data_schema=vol.Schema(
                 {
+                    vol.Optional(
+                        CONF_SOURCE, default=user_input.get(CONF_SOURCE, DEFAULT_SOURCE)
+                    ): vol.In(SOURCES),
                     vol.Optional(
                         CONF_WEATHER_STATION, default=user_input.get(CONF_WEATHER_STATION, DEFAULT_WEATHER_STATION)
                     ): vol.In(list(STATION_MAPPING)),
+                    vol.Optional(
+                        CONF_TEMPERATURE_SENSOR, default=user_input.get(CONF_TEMPERATURE_SENSOR, DEFAULT_TEMPERATURE_SENSOR)
+                    ): str,
                     vol.Optional(
                         CONF_INDOOR_TEMP, default=user_input.get(CONF_INDOOR_TEMP, DEFAULT_INDOOR_TEMP)
                     ): cv.positive_float,
@@ -103,6 +137,18 @@ class DegreeDaysConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     vol.Optional(
                         CONF_HEATPUMP, default=user_input.get(CONF_HEATPUMP, DEFAULT_HEATPUMP)
                     ): cv.boolean,
+                    vol.Optional(
+                        CONF_BREAKDOWN, default=user_input.get(CONF_BREAKDOWN, DEFAULT_BREAKDOWN)
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_WEIGHT_FACTORS, default=user_input.get(CONF_WEIGHT_FACTORS, DEFAULT_WEIGHT_FACTORS)
+                    ): str,
+                    vol.Optional(
+                        CONF_HEATING_BASE_TEMPS, default=user_input.get(CONF_HEATING_BASE_TEMPS, DEFAULT_HEATING_BASE_TEMPS)
+                    ): str,
+                    vol.Optional(
+                        CONF_COOLING_BASE_TEMPS, default=user_input.get(CONF_COOLING_BASE_TEMPS, DEFAULT_COOLING_BASE_TEMPS)
+                    ): str,
                 }
             ),
             errors=self._errors,
@@ -119,6 +165,22 @@ class DegreeDaysConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         except ValueError:
             return False
 
+    async def _weight_factors_validation(self, weight_factors) -> bool:
+        """Return True if the weight factors are 12 comma separated positive numbers."""
+        try:
+            parse_weight_factors(weight_factors)
+            return True
+        except ValueError:
+            return False
+
+    async def _temperatures_validation(self, temperatures) -> bool:
+        """Return True if the temperatures are comma separated numbers."""
+        try:
+            parse_temperatures(temperatures)
+            return True
+        except ValueError:
+            return False
+
     async def _weather_station_in_configuration_exists(self, hass, weather_station_entry) -> bool:
         """Return True if weather station exists in configuration."""
         if weather_station_entry in degree_days_entries(hass):
@@ -147,6 +209,14 @@ class DegreeDaysOptionsFlowHandler(config_entries.OptionsFlow):
             )
             if not valid_date:
                  self._errors[CONF_STARTDAY] = "invalid_startday"
+            elif user_input[CONF_SOURCE] == SOURCE_LOCAL and not user_input[CONF_TEMPERATURE_SENSOR]:
+                self._errors[CONF_TEMPERATURE_SENSOR] = "no_temperature_sensor"
+            elif not await self._weight_factors_validation(user_input[CONF_WEIGHT_FACTORS]):
+                self._errors[CONF_WEIGHT_FACTORS] = "invalid_weight_factors"
+            elif not await self._temperatures_validation(user_input[CONF_HEATING_BASE_TEMPS]):
+                self._errors[CONF_HEATING_BASE_TEMPS] = "invalid_temperatures"
+            elif not await self._temperatures_validation(user_input[CONF_COOLING_BASE_TEMPS]):
+                self._errors[CONF_COOLING_BASE_TEMPS] = "invalid_temperatures"
             else:
                 return await self._update_options()
 
@@ -154,9 +224,15 @@ class DegreeDaysOptionsFlowHandler(config_entries.OptionsFlow):
             step_id="user",
             data_schema=vol.Schema(
                 {
+                    vol.Optional(
+                        CONF_SOURCE, default=self.options.get(CONF_SOURCE, DEFAULT_SOURCE)
+                    ): vol.In(SOURCES),
                     vol.Optional(
                         CONF_WEATHER_STATION, default=self.options.get(CONF_WEATHER_STATION, DEFAULT_WEATHER_STATION)
                     ): vol.In(list(STATION_MAPPING)),
+                    vol.Optional(
+                        CONF_TEMPERATURE_SENSOR, default=self.options.get(CONF_TEMPERATURE_SENSOR, DEFAULT_TEMPERATURE_SENSOR)
+                    ): str,
                     vol.Optional(
                         CONF_INDOOR_TEMP, default=self.options.get(CONF_INDOOR_TEMP, DEFAULT_INDOOR_TEMP)
                     ): cv.positive_float,
@@ -178,6 +254,18 @@ class DegreeDaysOptionsFlowHandler(config_entries.OptionsFlow):
                     vol.Optional(
                         CONF_HEATPUMP, default=self.options.get(CONF_HEATPUMP, DEFAULT_HEATPUMP)
                     ): cv.boolean,
+                    vol.Optional(
+                        CONF_BREAKDOWN, default=self.options.get(CONF_BREAKDOWN, DEFAULT_BREAKDOWN)
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_WEIGHT_FACTORS, default=self.options.get(CONF_WEIGHT_FACTORS, DEFAULT_WEIGHT_FACTORS)
+                    ): str,
+                    vol.Optional(
+                        CONF_HEATING_BASE_TEMPS, default=self.options.get(CONF_HEATING_BASE_TEMPS, DEFAULT_HEATING_BASE_TEMPS)
+                    ): str,
+                    vol.Optional(
+                        CONF_COOLING_BASE_TEMPS, default=self.options.get(CONF_COOLING_BASE_TEMPS, DEFAULT_COOLING_BASE_TEMPS)
+                    ): str,
                 }
             ),
             errors=self._errors,
@@ -208,3 +296,19 @@ class DegreeDaysOptionsFlowHandler(config_entries.OptionsFlow):
             return True
         except ValueError:
             return False
+
+    async def _weight_factors_validation(self, weight_factors) -> bool:
+        """Return True if the weight factors are 12 comma separated positive numbers."""
+        try:
+            parse_weight_factors(weight_factors)
+            return True
+        except ValueError:
+            return False
+
+    async def _temperatures_validation(self, temperatures) -> bool:
+        """Return True if the temperatures are comma separated numbers."""
+        try:
+            parse_temperatures(temperatures)
+            return True
+        except ValueError:
+            return False
@@ -6,7 +6,8 @@ from dataclasses import dataclass
 from homeassistant.components.sensor import (SensorDeviceClass,
                                              SensorEntityDescription,
                                              SensorStateClass)
-from homeassistant.const import UnitOfEnergy, UnitOfTemperature, UnitOfVolume
+from homeassistant.const import (EntityCategory, UnitOfEnergy,
+                                 UnitOfTemperature, UnitOfTime, UnitOfVolume)
 from homeassistant.util import dt
 
 DOMAIN = "degree_days"
@@ -22,6 +23,13 @@ CONF_GAS_USE_OTHER = "gas use other"
 CONF_CONSUMPTION_SENSOR = "consumption sensor"
 CONF_DHW_CONSUMPTION = "dhw consumption"
 CONF_HEATPUMP = "heatpump"
+CONF_SOURCE = "source"
+CONF_TEMPERATURE_SENSOR = "temperature sensor"
+CONF_BREAKDOWN = "breakdown"
+CONF_WEIGHT_FACTORS = "weight factors"
+CONF_HEATING_BASE_TEMPS = "heating base temperatures"
+CONF_COOLING_BASE_TEMPS = "cooling base temperatures"
+CONF_MAX_CONCURRENT_UPDATES = "max_concurrent_updates"
 
 DEFAULT_HEATING_LIMIT = 18.0
 DEFAULT_INDOOR_TEMP = 18.0
@@ -31,6 +39,40 @@ DEFAULT_STARTMONTH = "January"
 DEFAULT_CONSUMPTION_SENSOR = ""
 DEFAULT_DHW_CONSUMPTION = 0
 DEFAULT_HEATPUMP = False
+DEFAULT_TEMPERATURE_SENSOR = ""
+DEFAULT_BREAKDOWN = False
+DEFAULT_HEATING_BASE_TEMPS = ""
+DEFAULT_COOLING_BASE_TEMPS = ""
+DEFAULT_MAX_CONCURRENT_UPDATES = 1
+
+# Sources for the daily mean outdoor temperature.
+SOURCE_KNMI = "KNMI"
+SOURCE_LOCAL = "Local sensor"
+SOURCES = [SOURCE_KNMI, SOURCE_LOCAL]
+DEFAULT_SOURCE = SOURCE_KNMI
+
+STORAGE_VERSION = 1
+# Delay in seconds before the last computed data is stored
+STORAGE_SAVE_DELAY = 10
+
+# Scheduler for the calculations of all config entries
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+SIGNAL_SCHEDULER_UPDATED = f"{DOMAIN}_scheduler_updated"
+# Maximum random delay in seconds before an update of an entry with up to date data
+SCHEDULER_JITTER = 30
+
+# What-if service
+SERVICE_WHAT_IF = "what_if"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_INDOOR_TEMP_MIN = "indoor_temp_min"
+ATTR_INDOOR_TEMP_MAX = "indoor_temp_max"
+ATTR_INDOOR_TEMP_STEP = "indoor_temp_step"
+ATTR_HEATING_LIMIT_MIN = "heating_limit_min"
+ATTR_HEATING_LIMIT_MAX = "heating_limit_max"
+ATTR_HEATING_LIMIT_STEP = "heating_limit_step"
+DEFAULT_STEP = 0.5
+# Maximum number of indoor temperatures or heating limits in the what-if grid
+MAX_GRID_SIZE = 50
 
 # KNMI weather stations (NL).
 STATION_MAPPING = {
@@ -100,6 +142,21 @@ WEIGHT_FACTOR = {
     11: 1.1,
     12: 1.1
 }
+# Periods of the breakdown sensors
+BREAKDOWN_PERIODS = {
+    "this_month": "this month",
+    "this_week": "this week",
+    "last_7_days": "last 7 days",
+    "last_30_days": "last 30 days",
+}
+# Daily values of the breakdown sensors
+BREAKDOWN_VALUES = {
+    "DD": "degree_days",
+    "WDD": "weighted_degree_days",
+    "DD_average": "degree_days_average",
+    "WDD_average": "weighted_degree_days_average",
+}
+DEFAULT_WEIGHT_FACTORS = ", ".join(str(value) for value in WEIGHT_FACTOR.values())
 MONTHS = [
     "January",
     "February",
@@ -165,6 +222,22 @@ GAS_SENSOR_TYPES: tuple[DegreeDaysSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.GAS,
         state_class=SensorStateClass.TOTAL,
     ),
+    DegreeDaysSensorEntityDescription(
+        key="gas_base_load",
+        name="gas base load per day",
+        icon="mdi:fire",
+        native_unit_of_measurement=UnitOfVolume.CUBIC_METERS,
+        device_class=None,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    DegreeDaysSensorEntityDescription(
+        key="gas_per_weighted_degree_day_fitted",
+        name="gas consumption per weighted degree day fitted",
+        icon="mdi:fire",
+        native_unit_of_measurement=UnitOfVolume.CUBIC_METERS,
+        device_class=None,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
 )
 
 
@@ -193,4 +266,59 @@ HEATPUMP_SENSOR_TYPES: tuple[DegreeDaysSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL,
     ),
+    DegreeDaysSensorEntityDescription(
+        key="energy_consumption_base_load",
+        name="energy consumption base load per day",
+        icon="mdi:home-lightning-bolt",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=None,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    DegreeDaysSensorEntityDescription(
+        key="energy_consumption_per_weighted_degree_day_fitted",
+        name="energy consumption per weighted degree day fitted",
+        icon="mdi:home-lightning-bolt",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=None,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+)
+
+
+BREAKDOWN_SENSOR_TYPES: tuple[DegreeDaysSensorEntityDescription, ...] = tuple(
+    DegreeDaysSensorEntityDescription(
+        key=f"{value}_{period}",
+        name=f"{value.replace('_average', '_20_year_average').replace('_', ' ')} {period_name}",
+        icon="mdi:thermometer",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=None,
+        state_class=SensorStateClass.MEASUREMENT,
+    )
+    for value in BREAKDOWN_VALUES.values()
+    for period, period_name in BREAKDOWN_PERIODS.items()
+)
+
+
+# Sensor of the scheduler of all entries, added once for the integration
+QUEUE_SENSOR_TYPE = DegreeDaysSensorEntityDescription(
+    key="update_queue_depth",
+    name="update queue depth",
+    icon="mdi:tray-full",
+    native_unit_of_measurement=None,
+    device_class=None,
+    state_class=SensorStateClass.MEASUREMENT,
+    entity_category=EntityCategory.DIAGNOSTIC,
+)
+
+
+SCHEDULER_SENSOR_TYPES: tuple[DegreeDaysSensorEntityDescription, ...] = (
+    DegreeDaysSensorEntityDescription(
+        key="update_wait_time",
+        name="update wait time",
+        icon="mdi:timer-sand",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
 )
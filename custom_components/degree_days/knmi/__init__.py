@@ -2,15 +2,25 @@
 from datetime import datetime
 from io import StringIO
 
+import numpy as np
 import pandas as pd
 import requests
 
-from ..const import STATION_MAPPING, WEIGHT_FACTOR
+from ..const import BREAKDOWN_VALUES, STATION_MAPPING, WEIGHT_FACTOR
+
+# Number of days before today that are used for the breakdown
+BREAKDOWN_DAYS = 31
+
+
+def base_temp_key(base_temp):
+    """Return the base temperature as used in the keys, eg 15_5 for 15.5."""
+    return f"{float(base_temp):g}".replace(".", "_").replace("-", "minus_")
 
 
 class KNMI:
     """KMNI data"""
-    def __init__(self, startdate, station, T_indoor, T_heatinglimit, total_consumption, dhw_consumption, heatpump):
+    def __init__(self, startdate, station, T_indoor, T_heatinglimit, total_consumption, dhw_consumption, heatpump,
+                 breakdown=False, weight_factors=None, heating_base_temps=(), cooling_base_temps=()):
         self.startdate = startdate
         self.station = station
         self.T_indoor = T_indoor
@@ -18,6 +28,10 @@ class KNMI:
         self.total_consumption = total_consumption
         self.dhw_consumption_per_day = dhw_consumption * 12 / 365
         self.heatpump = heatpump
+        self.breakdown = breakdown
+        self.weight_factors = weight_factors or WEIGHT_FACTOR
+        self.heating_base_temps = heating_base_temps
+        self.cooling_base_temps = cooling_base_temps
         data = self.get_degree_days()
 
         self.last_update = data["last_update"]
@@ -31,19 +45,21 @@ class KNMI:
             self.gas_per_weighted_degree_day = data["consumption_per_weighted_degree_day"]
             self.gas_prognose_total = data["consumption_prognose_total"]
             self.gas_prognose_heating = data["consumption_prognose_heating"]
+        self.consumption_heating = data["consumption_heating"]
+        if self.breakdown:
+            for key, value in data["breakdown"].items():
+                setattr(self, key, value)
+        for key, value in data["base_temps"].items():
+            setattr(self, key, value)
 
     def get_degree_days(self):
         """Calculate degree days."""
         enddate = datetime.now().strftime("%Y%m%d")
 
-        station_code = STATION_MAPPING[self.station]
         year = datetime.strptime(self.startdate, '%Y%m%d').year
-        variables = ['TG']
         # Get data for the last 20 years
-        df = self.get_daily_data_df(self.startdate.replace(str(year), str(int(year) - 20), 1), enddate, [station_code],
-                               variables)
+        df = self.get_temperature_df(self.startdate.replace(str(year), str(int(year) - 20), 1), enddate)
 
-        df = df.rename(columns={'   TG': 'TG'})
         df['Date'] = pd.to_datetime(df['YYYYMMDD'], format='%Y%m%d')
         df["TG"] = pd.to_numeric(df["TG"], errors='coerce', downcast="float")
 
@@ -57,14 +73,20 @@ class KNMI:
         df = pd.merge(df, df_average, on=['day'], how='left')
 
         # add weight factor based on month
-        df['WF'] = df['month'].map(lambda value: WEIGHT_FACTOR[value])
+        df['WF'] = df['month'].map(self.weight_factors)
+
+        # Calculate the degree days of all definitions in one batch, for the daily and the 20 year average temperature
+        T = df[["TG", "TG_average"]].to_numpy(dtype=float).T / 10
+        T_indoor = np.array([self.T_indoor, *self.heating_base_temps], dtype=float)[:, None, None]
+        T_heatinglimit = np.array([self.T_heatinglimit, *self.heating_base_temps], dtype=float)[:, None, None]
+        heating = self.calculate_DD(T, T_indoor, T_heatinglimit)
+        cooling = self.calculate_CDD(T, np.array(self.cooling_base_temps, dtype=float)[:, None, None])
 
-        # Calculate degree days
-        df["DD"] = df.apply(lambda x: self.calculate_DD(x.TG, 1.0), axis=1)
-        # Calculate weighted degree days
-        df["WDD"] = df.apply(lambda x: self.calculate_DD(x.TG, x.WF), axis=1)
-        # Calculate 20 year average weighted degree days
-        df["WDD_average"] = df.apply(lambda x: self.calculate_DD(x.TG_average, x.WF), axis=1)
+        # Degree days, weighted degree days and 20 year average (weighted) degree days
+        df["DD"] = heating[0, 0]
+        df["WDD"] = heating[0, 0] * df["WF"]
+        df["DD_average"] = heating[0, 1]
+        df["WDD_average"] = heating[0, 1] * df["WF"]
 
         # calculate degree year
         DD = df[df.year == year].DD.sum()
@@ -77,11 +99,17 @@ class KNMI:
         WDD_average_total = df[df["Date"].between(startdate_offset_year, self.startdate)].WDD_average.sum()
         WDD_average_cum = df[df.Date >= self.startdate].WDD_average.sum()
 
+        # keep the daily series for the consumption fit
+        self.df = df
+
         data = {}
 
         data["last_update"] = df["YYYYMMDD"].iloc[-1]
         data["total_degree_days_this_year"] = DD
         data["weighted_degree_days_year"] = WDD
+        if self.breakdown:
+            data["breakdown"] = self.get_breakdown(df)
+        data["base_temps"] = self.get_base_temps(df, heating[1:, 0], cooling[:, 0])
         last_update = str(df["YYYYMMDD"].iloc[-1])
         number_of_days_consumption = (datetime.strptime(enddate, '%Y%m%d') - datetime.strptime(self.startdate, '%Y%m%d')).days
 
@@ -97,21 +125,168 @@ class KNMI:
             consumption_prognose_total = round(consumption_prognose_heating + self.dhw_consumption_per_day * 365 , 1)
             consumption_per_weighted_degree_day = round(consumption_heating / WDD, 3)
 
+            data["consumption_heating"] = consumption_heating
             data["consumption_per_weighted_degree_day"] = consumption_per_weighted_degree_day
             data["consumption_prognose_heating"] = consumption_prognose_heating
             data["consumption_prognose_total"] = consumption_prognose_total
         else:
+            data["consumption_heating"] = None
             data["consumption_per_weighted_degree_day"] = None
             data["consumption_prognose_heating"] = None
             data["consumption_prognose_total"] = None
         return data
 
-    def calculate_DD(self, TG, WF):
-        """Calculate Weighted Degree Days"""
-        if self.T_heatinglimit - TG/10 <= 0:
-            return 0
-        else:
-            return (max(self.T_indoor - TG / 10, 0) * WF)
+    def get_base_temps(self, df, heating, cooling):
+        """Calculate the totals since the startdate for the additional base temperatures.
+
+        Parameters
+        ----------
+        df : DataFrame
+            Containing the columns Date and WF (weight factor)
+        heating : ndarray
+            Heating degree days per heating base temperature and day
+        cooling : ndarray
+            Cooling degree days per cooling base temperature and day
+
+        Returns
+        -------
+        dict
+            Containing the (weighted) heating degree days and cooling degree days per base temperature
+        """
+        since_start = (df.Date >= self.startdate).to_numpy()
+        WF = df["WF"].to_numpy(dtype=float)[since_start]
+        DD = heating[:, since_start].sum(axis=1)
+        WDD = heating[:, since_start] @ WF
+        CDD = cooling[:, since_start].sum(axis=1)
+
+        base_temps = {}
+        for index, base_temp in enumerate(self.heating_base_temps):
+            base_temps[f"degree_days_base_{base_temp_key(base_temp)}"] = round(float(DD[index]), 1)
+            base_temps[f"weighted_degree_days_base_{base_temp_key(base_temp)}"] = round(float(WDD[index]), 1)
+        for index, base_temp in enumerate(self.cooling_base_temps):
+            base_temps[f"cooling_degree_days_base_{base_temp_key(base_temp)}"] = round(float(CDD[index]), 1)
+        return base_temps
+
+    def get_breakdown(self, df):
+        """Calculate the (weighted) degree days of this month, this week and the last 7 and 30 days.
+
+        KNMI has no data of today yet, so all periods end yesterday: this month and this week
+        start at their first day and are 0 on the first day of the month or the week. The
+        daily values are summed per day in a single grouped aggregation. The total of every
+        period then follows from the cumulative sum, so additional periods do not add
+        another pass over the data.
+
+        Parameters
+        ----------
+        df : DataFrame
+            Containing the columns Date and the daily values in BREAKDOWN_VALUES
+
+        Returns
+        -------
+        dict
+            Containing the total of every daily value for every period
+        """
+        today = pd.Timestamp(datetime.now().date())
+        yesterday = today - pd.Timedelta(days=1)
+        periods = {
+            "this_month": today.day - 1,
+            "this_week": today.isoweekday() - 1,
+            "last_7_days": 7,
+            "last_30_days": 30,
+        }
+        days_ago = (yesterday - df['Date']).dt.days.to_numpy()
+        recent = (days_ago >= 0) & (days_ago < BREAKDOWN_DAYS)
+        days_ago = days_ago[recent]
+
+        breakdown = {}
+        for column, value in BREAKDOWN_VALUES.items():
+            # Total of the last n days at index n, starting with 0 for a period without days
+            cumulative = np.concatenate(([0.0], np.cumsum(
+                np.bincount(days_ago, weights=df[column].to_numpy()[recent], minlength=BREAKDOWN_DAYS)
+            )))
+            for period, days in periods.items():
+                breakdown[f"{value}_{period}"] = round(float(cumulative[days]), 1)
+        return breakdown
+
+    def what_if(self, indoor_temps, heating_limits):
+        """Calculate the degree days since the startdate for a grid of indoor temperatures and heating limits.
+
+        All combinations are calculated at once by broadcasting the daily mean temperatures
+        against the grid, so no new data has to be requested.
+
+        Parameters
+        ----------
+        indoor_temps : [float]
+            List of mean indoor temperatures
+        heating_limits : [float]
+            List of heating temperature limits
+
+        Returns
+        -------
+        dict
+            Containing the degree days, weighted degree days and consumption per weighted
+            degree day, as a list per indoor temperature with a value per heating limit
+        """
+        df = self.df[self.df.Date >= self.startdate]
+        TG = df["TG"].to_numpy(dtype=float) / 10
+        T_indoor = np.asarray(indoor_temps, dtype=float)[:, None, None]
+        T_heatinglimit = np.asarray(heating_limits, dtype=float)[None, :, None]
+
+        DD = self.calculate_DD(TG, T_indoor, T_heatinglimit)
+        DD_total = DD.sum(axis=2)
+        WDD_total = DD @ df["WF"].to_numpy(dtype=float)
+
+        consumption_per_weighted_degree_day = None
+        if self.consumption_heating is not None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                consumption_per_weighted_degree_day = np.where(
+                    WDD_total > 0, self.consumption_heating / WDD_total, np.nan
+                ).round(3)
+            consumption_per_weighted_degree_day = [
+                [None if np.isnan(value) else float(value) for value in row]
+                for row in consumption_per_weighted_degree_day
+            ]
+
+        return {
+            "indoor_temperatures": [float(value) for value in indoor_temps],
+            "heating_limits": [float(value) for value in heating_limits],
+            "degree_days": DD_total.round(1).tolist(),
+            "weighted_degree_days": WDD_total.round(1).tolist(),
+            "consumption_per_weighted_degree_day": consumption_per_weighted_degree_day,
+        }
+
+    @staticmethod
+    def calculate_DD(T, T_indoor, T_heatinglimit):
+        """Calculate Degree Days
+
+        All parameters are arrays that are broadcast against each other, so multiple
+        definitions are calculated at once. Days without a temperature have no degree days.
+        """
+        return np.where(T_heatinglimit - T > 0, np.maximum(T_indoor - T, 0), 0)
+
+    @staticmethod
+    def calculate_CDD(T, T_base):
+        """Calculate Cooling Degree Days"""
+        return np.where(T - T_base > 0, T - T_base, 0)
+
+    def get_temperature_df(self, startdate, enddate):
+        """Get the daily mean temperatures of the weather station.
+
+        Parameters
+        ----------
+        startdate : str
+            Startdate in string format, eg '20210101'
+        enddate : str
+            Enddate in string format, eg '20210101'
+
+        Returns
+        -------
+        DataFrame
+            Containing the columns YYYYMMDD and TG (daily mean temperature in 0.1 degrees Celsius)
+        """
+        station_code = STATION_MAPPING[self.station]
+        df = self.get_daily_data_df(startdate, enddate, [station_code], ['TG'])
+        return df.rename(columns={'   TG': 'TG'})
 
     def get_daily_data_df(self, startdate, enddate, stations, variables):
         """Request and parse data from knmi api.
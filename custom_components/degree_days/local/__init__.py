@@ -0,0 +1,110 @@
+"""Module to calculate the (weighted) degree days from a local temperature sensor"""
+import logging
+from datetime import datetime
+
+import pandas as pd
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import \
+    statistics_during_period
+from homeassistant.const import UnitOfTemperature
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from ..const import DOMAIN, STORAGE_VERSION
+from ..knmi import KNMI
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of years of statistics to collect on the first update
+HISTORY_YEARS = 20
+
+
+class LocalTemperature(KNMI):
+    """Local temperature sensor data"""
+    def __init__(self, daily_means, startdate, *args, **kwargs):
+        self.daily_means = daily_means
+        super().__init__(startdate, None, *args, **kwargs)
+
+    def get_temperature_df(self, startdate, enddate):
+        """Get the daily mean temperatures from the aggregated sensor statistics.
+
+        Parameters
+        ----------
+        startdate : str
+            Startdate in string format, eg '20210101'
+        enddate : str
+            Enddate in string format, eg '20210101'
+
+        Returns
+        -------
+        DataFrame
+            Containing the columns YYYYMMDD and TG (daily mean temperature in 0.1 degrees Celsius)
+        """
+        days = sorted(day for day in self.daily_means if startdate <= day <= enddate)
+        return pd.DataFrame({
+            'YYYYMMDD': [int(day) for day in days],
+            'TG': [self.daily_means[day] * 10 for day in days],
+        })
+
+
+class LocalTemperatureHistory:
+    """Daily mean temperatures of a local sensor, aggregated from the recorder statistics.
+
+    Completed days are persisted, so only the newest day has to be queried from the
+    recorder on every update.
+    """
+    def __init__(self, hass: HomeAssistant, entry_id, entity_id):
+        self.hass = hass
+        self.entity_id = entity_id
+        self.daily_means = {}
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.local")
+        self._loaded = False
+
+    async def async_update(self):
+        """Add the daily means of the days since the last update and return all daily means."""
+        if not self._loaded:
+            await self._async_load()
+
+        today = dt_util.start_of_local_day()
+        if self.daily_means:
+            # Query the last stored day again, it may have been compiled before the day ended
+            start = dt_util.start_of_local_day(datetime.strptime(max(self.daily_means), '%Y%m%d').date())
+        else:
+            start = today.replace(year=today.year - HISTORY_YEARS)
+
+        if start < today:
+            statistics = await get_instance(self.hass).async_add_executor_job(
+                statistics_during_period,
+                self.hass,
+                start,
+                today,
+                {self.entity_id},
+                "day",
+                {"temperature": UnitOfTemperature.CELSIUS},
+                {"mean"},
+            )
+            changed = False
+            for row in statistics.get(self.entity_id, []):
+                if row.get("mean") is None:
+                    continue
+                day = dt_util.as_local(dt_util.utc_from_timestamp(row["start"])).strftime("%Y%m%d")
+                if self.daily_means.get(day) != row["mean"]:
+                    self.daily_means[day] = row["mean"]
+                    changed = True
+            if changed:
+                await self._store.async_save({"entity_id": self.entity_id, "daily_means": self.daily_means})
+
+        _LOGGER.debug("%d daily means available for %s", len(self.daily_means), self.entity_id)
+        return dict(self.daily_means)
+
+    async def async_remove(self):
+        """Remove the stored daily means."""
+        await self._store.async_remove()
+
+    async def _async_load(self):
+        """Load the stored daily means of the sensor."""
+        stored = await self._store.async_load()
+        if stored and stored.get("entity_id") == self.entity_id:
+            self.daily_means = stored["daily_means"]
+        self._loaded = True
@@ -0,0 +1,148 @@
+"""Online regression of the daily consumption versus the weighted degree days."""
+import logging
+from datetime import datetime, timedelta
+
+import pandas as pd
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import \
+    statistics_during_period
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of days of statistics to collect on the first update
+HISTORY_DAYS = 365
+# Time after the end of a day before its statistics are compiled completely
+COMPILE_DELAY = timedelta(hours=1)
+
+
+class ConsumptionRegression:
+    """Fit consumption = base load + slope * WDD with an online least squares estimator.
+
+    Only the sufficient statistics (number of days and the sums of x, y, x*x and x*y) are
+    stored, so every new day updates the fit in constant time, without reading the
+    recorder history again.
+    """
+    def __init__(self, hass: HomeAssistant, entry_id, entity_id, settings):
+        self.hass = hass
+        self.entity_id = entity_id
+        self.settings = settings
+        self.last_day = None
+        self.n = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_xy = 0.0
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.regression")
+        self._loaded = False
+
+    @property
+    def slope(self):
+        """Return the fitted consumption per weighted degree day."""
+        denominator = self.n * self.sum_xx - self.sum_x ** 2
+        if self.n < 2 or denominator <= 0:
+            return None
+        return (self.n * self.sum_xy - self.sum_x * self.sum_y) / denominator
+
+    @property
+    def base_load(self):
+        """Return the fitted consumption per day that does not depend on the weighted degree days."""
+        slope = self.slope
+        if slope is None:
+            return None
+        return (self.sum_y - slope * self.sum_x) / self.n
+
+    def add(self, weighted_degree_days, consumption):
+        """Add the consumption of one day to the fit."""
+        self.n += 1
+        self.sum_x += weighted_degree_days
+        self.sum_y += consumption
+        self.sum_xx += weighted_degree_days ** 2
+        self.sum_xy += weighted_degree_days * consumption
+
+    async def async_update(self, df):
+        """Add the daily consumption of the days since the last update to the fit.
+
+        Parameters
+        ----------
+        df : DataFrame
+            Containing the columns YYYYMMDD, TG (daily mean temperature) and WDD (weighted degree days per day)
+        """
+        if not self._loaded:
+            await self._async_load()
+
+        # Days are added to the fit only once, so wait until the last hour of the day is compiled
+        end = dt_util.start_of_local_day(dt_util.now() - COMPILE_DELAY)
+        if self.last_day:
+            start = dt_util.start_of_local_day(
+                datetime.strptime(self.last_day, '%Y%m%d').date() + timedelta(days=1)
+            )
+        else:
+            start = end - timedelta(days=HISTORY_DAYS)
+        if start >= end:
+            return
+
+        statistics = await get_instance(self.hass).async_add_executor_job(
+            statistics_during_period,
+            self.hass,
+            start,
+            end,
+            {self.entity_id},
+            "day",
+            None,
+            {"change"},
+        )
+
+        # Days without weighted degree days yet (e.g. KNMI data lags behind) are added on a next update
+        df = df[df.YYYYMMDD >= int(start.strftime('%Y%m%d'))]
+        # Days with a missing temperature have no weighted degree days to fit against
+        weighted_degree_days = dict(zip(df.YYYYMMDD.astype(str), df.WDD.where(df.TG.notna())))
+        changed = False
+        for row in statistics.get(self.entity_id, []):
+            day = dt_util.as_local(dt_util.utc_from_timestamp(row["start"])).strftime("%Y%m%d")
+            if day not in weighted_degree_days:
+                continue
+            if pd.notna(weighted_degree_days[day]) and row.get("change") is not None and row["change"] >= 0:
+                self.add(float(weighted_degree_days[day]), row["change"])
+            self.last_day = day
+            changed = True
+
+        if changed:
+            _LOGGER.debug(
+                "Consumption fit of %s updated up to %s with %d days: base load %s, slope %s",
+                self.entity_id, self.last_day, self.n, self.base_load, self.slope,
+            )
+            await self._store.async_save(self._as_dict())
+
+    async def async_remove(self):
+        """Remove the stored fit."""
+        await self._store.async_remove()
+
+    def _as_dict(self):
+        """Return the sufficient statistics of the fit."""
+        return {
+            "entity_id": self.entity_id,
+            "settings": self.settings,
+            "last_day": self.last_day,
+            "n": self.n,
+            "sum_x": self.sum_x,
+            "sum_y": self.sum_y,
+            "sum_xx": self.sum_xx,
+            "sum_xy": self.sum_xy,
+        }
+
+    async def _async_load(self):
+        """Load the stored fit, unless the sensor or the degree day settings have changed."""
+        stored = await self._store.async_load()
+        if stored and stored.get("entity_id") == self.entity_id and stored.get("settings") == self.settings:
+            self.last_day = stored["last_day"]
+            self.n = stored["n"]
+            self.sum_x = stored["sum_x"]
+            self.sum_y = stored["sum_y"]
+            self.sum_xx = stored["sum_xx"]
+            self.sum_xy = stored["sum_xy"]
+        self._loaded = True
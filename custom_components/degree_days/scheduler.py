@@ -0,0 +1,92 @@
+"""Scheduler to limit the number of concurrent degree days calculations."""
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+from time import monotonic
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .const import SCHEDULER_JITTER, SIGNAL_SCHEDULER_UPDATED
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ComputeScheduler:
+    """Run the calculations of all config entries in the executor, with a limited concurrency.
+
+    Calculations wait in a queue for a free slot. Entries with stale data go first,
+    the others start after a random delay, such that updates of multiple entries
+    that are due at the same time are spread out.
+    """
+    def __init__(self, hass: HomeAssistant, max_concurrent):
+        self.hass = hass
+        self.max_concurrent = max_concurrent
+        self.wait_times = {}
+        self.queue_sensor_entry_id = None
+        self._running = 0
+        self._queue = []
+        self._sequence = itertools.count()
+
+    @property
+    def queue_depth(self):
+        """Return the number of calculations waiting for a free slot."""
+        return sum(not future.done() for _, _, future in self._queue)
+
+    def async_claim_queue_sensor(self, entry_id):
+        """Return True if the config entry adds the queue depth sensor of the integration."""
+        if self.queue_sensor_entry_id in (None, entry_id):
+            self.queue_sensor_entry_id = entry_id
+            return True
+        return False
+
+    def async_remove(self, entry_id):
+        """Remove the wait time of a config entry."""
+        self.wait_times.pop(entry_id, None)
+
+    async def async_run(self, entry_id, stale, target, *args):
+        """Run target with args in the executor as soon as a slot is free and return the result."""
+        return await self.async_run_job(entry_id, stale, lambda: self.hass.async_add_executor_job(target, *args))
+
+    async def async_run_job(self, entry_id, stale, job_factory):
+        """Run the awaitable returned by job_factory as soon as a slot is free and return the result."""
+        if not stale:
+            await asyncio.sleep(random.uniform(0, SCHEDULER_JITTER))
+
+        start = monotonic()
+        if self._running < self.max_concurrent and not self.queue_depth:
+            self._running += 1
+        else:
+            future = self.hass.loop.create_future()
+            heapq.heappush(self._queue, (0 if stale else 1, next(self._sequence), future))
+            async_dispatcher_send(self.hass, SIGNAL_SCHEDULER_UPDATED)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # The slot was already handed over to this calculation
+                    self._async_release()
+                raise
+        self.wait_times[entry_id] = round(monotonic() - start, 1)
+        _LOGGER.debug("Calculation of %s started after waiting %s s", entry_id, self.wait_times[entry_id])
+        async_dispatcher_send(self.hass, SIGNAL_SCHEDULER_UPDATED)
+
+        # The slot is released when the job is done, also if the update is cancelled meanwhile
+        job = asyncio.ensure_future(job_factory())
+        job.add_done_callback(lambda _: self._async_release())
+        return await asyncio.shield(job)
+
+    def _async_release(self):
+        """Release a slot and start the waiting calculations that fit."""
+        self._running -= 1
+        self._async_start_waiting()
+
+    def _async_start_waiting(self):
+        """Hand over the free slots to the waiting calculations with the highest priority."""
+        while self._queue and self._running < self.max_concurrent:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                self._running += 1
+                future.set_result(None)
@@ -1,11 +1,17 @@
 """Platform for degree days sensors."""
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.const import UnitOfTemperature
 from homeassistant.helpers import update_coordinator
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import StateType
 
 from . import DegreeDaysData
-from .const import (DOMAIN, GAS_SENSOR_TYPES, HEATPUMP_SENSOR_TYPES,
-                    SENSOR_TYPES, DegreeDaysSensorEntityDescription)
+from .const import (BREAKDOWN_SENSOR_TYPES, DOMAIN, GAS_SENSOR_TYPES,
+                    HEATPUMP_SENSOR_TYPES, QUEUE_SENSOR_TYPE,
+                    SCHEDULER_SENSOR_TYPES, SENSOR_TYPES,
+                    SIGNAL_SCHEDULER_UPDATED,
+                    DegreeDaysSensorEntityDescription)
+from .knmi import base_temp_key
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
@@ -23,6 +29,47 @@ async def async_setup_entry(hass, entry, async_add_entities):
         async_add_entities(
             DegreeDaysSensor(coordinator, description) for description in GAS_SENSOR_TYPES
         )
+    if coordinator.breakdown:
+        async_add_entities(
+            DegreeDaysSensor(coordinator, description) for description in BREAKDOWN_SENSOR_TYPES
+        )
+    async_add_entities(
+        DegreeDaysSensor(coordinator, description) for description in base_temp_sensor_types(coordinator)
+    )
+    async_add_entities(
+        DegreeDaysSchedulerSensor(coordinator, description) for description in SCHEDULER_SENSOR_TYPES
+    )
+    if coordinator.scheduler.async_claim_queue_sensor(entry.entry_id):
+        async_add_entities([DegreeDaysQueueSensor(coordinator, QUEUE_SENSOR_TYPE)])
+
+
+def base_temp_sensor_types(coordinator):
+    """Return the sensor entity descriptions for the additional base temperatures."""
+    descriptions = []
+    for base_temp in coordinator.heating_base_temps:
+        for key, name in (("degree_days", "degree days"), ("weighted_degree_days", "weighted degree days")):
+            descriptions.append(
+                DegreeDaysSensorEntityDescription(
+                    key=f"{key}_base_{base_temp_key(base_temp)}",
+                    name=f"{name} base {base_temp:g}",
+                    icon="mdi:thermometer",
+                    native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+                    device_class=None,
+                    state_class=SensorStateClass.TOTAL,
+                )
+            )
+    for base_temp in coordinator.cooling_base_temps:
+        descriptions.append(
+            DegreeDaysSensorEntityDescription(
+                key=f"cooling_degree_days_base_{base_temp_key(base_temp)}",
+                name=f"cooling degree days base {base_temp:g}",
+                icon="mdi:snowflake-thermometer",
+                native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+                device_class=None,
+                state_class=SensorStateClass.TOTAL,
+            )
+        )
+    return descriptions
 
 
 class DegreeDaysSensor(update_coordinator.CoordinatorEntity, SensorEntity):
@@ -41,8 +88,52 @@ class DegreeDaysSensor(update_coordinator.CoordinatorEntity, SensorEntity):
         self._attr_name = f"{description.name}"
         self._attr_unique_id = f"{coordinator.unique_id}_{description.key}"
 
+    @property
+    def available(self) -> bool:
+        """Return True if there is data, also when it is restored or the last update failed."""
+        return self.coordinator.data is not None
+
     @property
     def native_value(self) -> StateType:
         """Return the native sensor value."""
-        state = getattr(self.coordinator.data, self.entity_description.key)
+        state = getattr(self.coordinator.data, self.entity_description.key, None)
         return state
+
+
+class DegreeDaysSchedulerSensor(DegreeDaysSensor):
+    """Representation of a sensor of the update scheduler."""
+
+    async def async_added_to_hass(self) -> None:
+        """Update the state when the queue of the scheduler changes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_SCHEDULER_UPDATED, self.async_write_ha_state)
+        )
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the native sensor value."""
+        return self.coordinator.scheduler.wait_times.get(self.coordinator.unique_id)
+
+
+class DegreeDaysQueueSensor(DegreeDaysSchedulerSensor):
+    """Representation of the queue depth sensor of all entries."""
+
+    def __init__(
+        self,
+        coordinator: DegreeDaysData,
+        description: DegreeDaysSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor, with a unique id of the integration instead of the entry."""
+        super().__init__(coordinator, description)
+        self._attr_unique_id = f"{DOMAIN}_{description.key}"
+
+    @property
+    def available(self) -> bool:
+        """Return True, the queue does not depend on the data of the entry."""
+        return True
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the native sensor value."""
+        return self.coordinator.scheduler.queue_depth